@@ -11,35 +11,51 @@
 
 All parsers (except ``finalize``, see docs) are always of the form:
 
-parser(input: str) -> tuple[bool, Optional[Any], str]
+parser(input: str, pos: int = 0) -> tuple[bool, Optional[Any], int]
 
-Where the first output is a boolean representing if the parser succeeded, the second is the parsed object, and the
- third is any remaining unparsed output.
+Where ``pos`` is the index in the input at which parsing starts. The first output is a boolean representing if the
+ parser succeeded, the second is the parsed object, and the third is the position just after the parsed item, i.e. where
+ the next parser should start. The input string itself is never sliced to pass the remainder along.
 
-If parsing fails, the second output will be ``None``, and the third output will be the entire input.
+If parsing fails, the second output will be ``None``, and the third output will be the starting position.
 """
 
+import copy
+import functools
+import itertools
+import linecache
+import re
+import weakref
+from contextvars import ContextVar
 from enum import Enum
-from typing import Callable, Any, Optional
+from typing import Callable, Any, NoReturn, Optional
 
-type ParserAny = Callable[[str], ParseResultAny]
-type ParseResultAny = tuple[bool, Optional[Any], str]
+type ParserAny = Callable[[str, int], ParseResultAny]
+type ParseResultAny = tuple[bool, Optional[Any], int]
 
-type ParserString = Callable[[str], ParseResultString]
-type ParseResultString = tuple[bool, Optional[str], str]
+type ParserString = Callable[[str, int], ParseResultString]
+type ParseResultString = tuple[bool, Optional[str], int]
 
-type ParserInt = Callable[[str], ParseResultInt]
-type ParseResultInt = tuple[bool, Optional[int], str]
+type ParserInt = Callable[[str, int], ParseResultInt]
+type ParseResultInt = tuple[bool, Optional[int], int]
 
-type ParserList = Callable[[str], ParseResultList]
-type ParseResultList = tuple[bool, Optional[list], str]
+type ParserList = Callable[[str, int], ParseResultList]
+type ParseResultList = tuple[bool, Optional[list], int]
 
-type ParserNone = Callable[[str], ParseResultNone]
-type ParseResultNone = tuple[bool, None, str]
+type ParserNone = Callable[[str, int], ParseResultNone]
+type ParseResultNone = tuple[bool, None, int]
 
 type ParserFinalized = Callable[[str], ParseResultFinalized]
 type ParseResultFinalized = Optional[Any]
 
+# Precompiled patterns for the terminal parsers that scan runs of characters, so the scan happens in a single C-level
+# regex match instead of one Python-level parser call per character. ``\s`` matches exactly what ``str.isspace`` does.
+_WS_RE = re.compile(r'\s*')
+# For callers that only skip whitespace: ``_match_whitespace(in_str, pos).end()`` is the position just after any
+# whitespace at ``pos``, without building the skipped text or a result tuple.
+_match_whitespace = _WS_RE.match
+_INT_RE = re.compile(r'[-+]?[0-9]+')
+
 
 class IgnoreWhitespaceType(Enum):
     """Describes where whitespace should be ignored around a given item."""
@@ -48,6 +64,64 @@ class IgnoreWhitespaceType(Enum):
     AROUND = 2
 
 
+def _describe(parser: ParserAny, kind: str, children: tuple, **options) -> ParserAny:
+    """Records how a combinator built the given parser, so that passes over a whole parser tree (like
+    ``compile_parser``) can see through the closure. Returns the parser itself."""
+    parser._kind = kind
+    parser._children = children
+    parser._options = options
+    return parser
+
+
+def _generate_factory(filename: str, lines: list[str], params: list[str], name: str) -> Callable[..., ParserAny]:
+    """Compiles the source of a function called ``name`` (given as lines), nested in a factory function taking
+    ``params``, and returns the factory. Calling the factory binds the params as closure variables of the generated
+    function, which are faster to load than globals, and returns the function. The source is registered with
+    ``linecache`` under ``filename`` so that tracebacks and debuggers can show it."""
+    source = '\n'.join([f'def factory({", ".join(params)}):', *(f'    {line}' for line in lines), f'    return {name}'])
+    namespace = {}
+    exec(compile(source, filename, 'exec'), namespace)
+    linecache.cache[filename] = (len(source), None, source.splitlines(keepends=True), filename)
+    return namespace['factory']
+
+
+# Combinators with at most this many parsers run as generated straight-line code; see ``_unrolled_factory``.
+_UNROLL_LIMIT = 16
+
+
+@functools.cache
+def _unrolled_factory(kind: str, arity: int, flag: bool) -> Callable[..., ParserAny]:
+    """Returns a factory for the parser of the given kind of combinator (``chain``, ``chain_join`` or ``any_of``) over
+    ``arity`` parsers, with the loop over the parsers unrolled into straight-line code. The factory takes the parsers as
+    arguments. The flag is ``skip_none_result`` for ``chain`` and ``at_least_one`` for ``any_of``. Since the generated
+    code only depends on these, it is generated once per combination, not once per parser built."""
+    params = [f'_p{i}' for i in range(arity)]
+    name = f'{kind}_parser'
+    lines = [f'def {name}(in_str, pos=0):']
+    if kind == 'any_of':
+        for param in params:
+            lines += [f'    ok, res, end = {param}(in_str, pos)',
+                      '    if ok:',
+                      '        return True, res, end']
+        lines.append(f'    return {not flag}, None, pos')
+    else:
+        position = 'pos'
+        for i, param in enumerate(params):
+            lines += [f'    ok, r{i}, p{i} = {param}(in_str, {position})',
+                      '    if not ok:',
+                      '        return False, None, pos']
+            position = f'p{i}'
+        results = ', '.join(f'r{i}' for i in range(arity))
+        if kind == 'chain_join':
+            result = "''.join([" + ', '.join(f"r{i} if r{i} is not None else ''" for i in range(arity)) + '])'
+        elif flag:
+            result = f'[r for r in ({results},) if r is not None]'
+        else:
+            result = f'[{results}]'
+        lines.append(f'    return True, {result}, {position}')
+    return _generate_factory(f'<functionalparser {kind} of {arity}>', lines, params, name)
+
+
 # COMBINATORS ==========================================================================================================
 
 
@@ -55,39 +129,72 @@ def star(parser: ParserAny) -> ParserList:
     """Returns a parser that repeats the given parser until it fails, returning a list of the results of the inner
     parser. Effectively equivalent to '*' in regex, matching zero or more.
 
-    **NOTE:** Because it can return zero results, the new parser is never considered to have failed.
+    **NOTE:** Because it can return zero results, the new parser is never considered to have failed. Repetition also
+    stops as soon as the inner parser succeeds without consuming any input, whose result is then left out, so that
+    parsers like ``star(optional(...))`` can't loop forever.
     :param parser: The parser to be acted on.
     :returns: A new parser, whose result is a (possibly empty) list holding the same type as the result of the input
      parser. Always returns ``True`` as the status."""
-
-    def star_parser(in_str: str) -> ParseResultList:
+    char_class = getattr(parser, '_char_class', None)
+    if char_class is not None:
+        # The results are exactly the characters in the run the inner parser accepts, so the whole run is matched with
+        # one regex call and taken in one slice.
+        match_run = re.compile(f'{char_class}*').match
+
+        def star_parser(in_str: str, pos: int = 0) -> ParseResultList:
+            end = match_run(in_str, pos).end()
+            if end > pos:
+                return True, list(in_str[pos:end]), end
+            # Nothing matched. Past the end of the input the match is clamped back to the end, so pos is kept instead.
+            return True, [], pos
+
+        return _describe(star_parser, 'star', (parser,))
+
+    def star_parser(in_str: str, pos: int = 0) -> ParseResultList:
         results = []
-        success, result, rest = parser(in_str)
-        while success:
-            results.append(result)
-            success, result, rest = parser(rest)
-        return True, results, rest
+        append = results.append
+        while True:
+            success, result, end = parser(in_str, pos)
+            if not success or end == pos:
+                return True, results, pos
+            append(result)
+            pos = end
 
-    return star_parser
+    return _describe(star_parser, 'star', (parser,))
 
 
 def star_join(parser: ParserString) -> ParserString:
     """Returns a parser that repeats the given string parser until it fails, returning a string of the results of the
     inner parser joined together. Effectively equivalent to '*' in regex, matching zero or more.
 
-    **NOTE:** Because it can match zero results, the new parser is never considered to have failed.
+    **NOTE:** Because it can match zero results, the new parser is never considered to have failed. As with ``star``,
+    repetition stops as soon as the inner parser succeeds without consuming any input.
     :param parser: The parser to be acted on.
     :returns: A new parser, whose result is a (possibly empty) string. Always returns ``True`` as the status."""
+    char_class = getattr(parser, '_char_class', None)
+    if char_class is not None:
+        # The result is exactly the run the inner parser accepts, so it is matched with one regex call. See ``star``.
+        match_run = re.compile(f'{char_class}*').match
 
-    def star_join_parser(in_str: str) -> ParseResultString:
-        joined_result = ''
-        success, result, rest = parser(in_str)
-        while success:
-            joined_result += result
-            success, result, rest = parser(rest)
-        return True, joined_result, rest
+        def star_join_parser(in_str: str, pos: int = 0) -> ParseResultString:
+            end = match_run(in_str, pos).end()
+            if end > pos:
+                return True, in_str[pos:end], end
+            return True, '', pos
 
-    return star_join_parser
+        return _describe(star_join_parser, 'star_join', (parser,))
+
+    def star_join_parser(in_str: str, pos: int = 0) -> ParseResultString:
+        parts = []
+        append = parts.append
+        while True:
+            success, result, end = parser(in_str, pos)
+            if not success or end == pos:
+                return True, ''.join(parts), pos
+            append(result)
+            pos = end
+
+    return _describe(star_join_parser, 'star_join', (parser,))
 
 
 def optional(parser: ParserAny) -> ParserAny:
@@ -96,11 +203,11 @@ def optional(parser: ParserAny) -> ParserAny:
     :returns: A new parser, which always returns ``True`` as its success status, but otherwise is identical to the input
      parser."""
 
-    def optional_parser(in_str: str) -> ParseResultAny:
-        _, result, rest = parser(in_str)
-        return True, result, rest
+    def optional_parser(in_str: str, pos: int = 0) -> ParseResultAny:
+        _, result, pos = parser(in_str, pos)
+        return True, result, pos
 
-    return optional_parser
+    return _describe(optional_parser, 'optional', (parser,))
 
 
 def chain(*parsers: ParserAny, skip_none_result: bool = False) -> ParserList:
@@ -114,19 +221,23 @@ def chain(*parsers: ParserAny, skip_none_result: bool = False) -> ParserList:
      any of the input parsers failed."""
     if len(parsers) == 0:
         raise ValueError(f'Must pass at least one parser to {chain.__name__}.')
+    if len(parsers) <= _UNROLL_LIMIT:
+        chain_parser = _unrolled_factory('chain', len(parsers), skip_none_result)(*parsers)
+        return _describe(chain_parser, 'chain', parsers, skip_none_result=skip_none_result)
 
-    def chain_parser(in_str: str) -> ParseResultList:
+    def chain_parser(in_str: str, pos: int = 0) -> ParseResultList:
         results = []
-        rest = in_str
+        append = results.append
+        cur = pos
         for p in parsers:
-            success, result, rest = p(rest)
+            success, result, cur = p(in_str, cur)
             if not success:
-                return False, None, in_str
+                return False, None, pos
             if result is not None or not skip_none_result:
-                results.append(result)
-        return True, results, rest
+                append(result)
+        return True, results, cur
 
-    return chain_parser
+    return _describe(chain_parser, 'chain', parsers, skip_none_result=skip_none_result)
 
 
 def chain_join(*parsers: ParserString) -> ParserString:
@@ -139,221 +250,684 @@ def chain_join(*parsers: ParserString) -> ParserString:
      ``None`` if any of the input parsers failed."""
     if len(parsers) == 0:
         raise ValueError(f'Must pass at least one parser to {chain_join.__name__}.')
+    if len(parsers) <= _UNROLL_LIMIT:
+        chain_parser_join = _unrolled_factory('chain_join', len(parsers), False)(*parsers)
+        return _describe(chain_parser_join, 'chain_join', parsers)
 
-    def chain_parser_join(in_str: str) -> ParseResultString:
-        joined_result = ''
-        rest = in_str
+    def chain_parser_join(in_str: str, pos: int = 0) -> ParseResultString:
+        parts = []
+        cur = pos
         for p in parsers:
-            success, result, rest = p(rest)
+            success, result, cur = p(in_str, cur)
             if not success:
-                return False, None, in_str
+                return False, None, pos
             if result is not None:
-                joined_result += result
-        return True, joined_result, rest
+                parts.append(result)
+        return True, ''.join(parts), cur
 
-    return chain_parser_join
+    return _describe(chain_parser_join, 'chain_join', parsers)
 
 
-def any_of(*parsers: ParserAny, at_least_one: bool = True):
+def any_of(*parsers: ParserAny, at_least_one: bool = True, predict: Optional[tuple[Optional[str], ...]] = None):
     """Returns a parser that executes each given parser in order, and returns the results from the first one that
     succeeds. If none succeed, this parser fails, unless ``at_least_one`` is set to ``False``.
     :param parsers: Any number of input parsers of any type. They will be executed in the order provided in the
      arguments.
     :param at_least_one: If ``True``, the returned parser fails if none of the input parsers succeed. If ``False``, it
-     will succeed anyway. Defaults to ``True``."""
+     will succeed anyway. Defaults to ``True``.
+    :param predict: Keyword argument only. If given, holds one entry per input parser: either a string of every
+     character that parser's input can start with, or ``None`` if it can start with anything (including nothing, at the
+     end of the input). Only the parsers that can start with the next character are tried, picked by a single lookup,
+     so alternatives that can't match are never called. Throws ``ValueError`` if it doesn't have one entry per parser.
+     Defaults to ``None``, trying every parser."""
     if len(parsers) == 0:
         raise ValueError(f'Must pass at least one parser to {any_of.__name__}.')
+    if predict is not None:
+        return _predictive_any_of(parsers, at_least_one, tuple(predict))
+    if len(parsers) <= _UNROLL_LIMIT:
+        any_of_parser = _unrolled_factory('any_of', len(parsers), at_least_one)(*parsers)
+        return _describe(any_of_parser, 'any_of', parsers, at_least_one=at_least_one, predict=None)
 
-    def any_of_parser(in_str: str) -> ParseResultAny:
+    def any_of_parser(in_str: str, pos: int = 0) -> ParseResultAny:
         for parser in parsers:
-            success, result, rest = parser(in_str)
+            success, result, end = parser(in_str, pos)
+            if success:
+                return success, result, end
+        return not at_least_one, None, pos
+
+    return _describe(any_of_parser, 'any_of', parsers, at_least_one=at_least_one, predict=None)
+
+
+def _predictive_any_of(parsers: tuple[ParserAny, ...], at_least_one: bool,
+                       predict: tuple[Optional[str], ...]) -> ParserAny:
+    """The parser built by ``any_of`` when ``predict`` is given."""
+    if len(predict) != len(parsers):
+        raise ValueError(f'Must pass one {any_of.__name__} prediction per parser, got {len(predict)} for '
+                         f'{len(parsers)} parsers.')
+    # Every character some parser was predicted for maps to the parsers that can start with it, still in order. Any
+    # other character, or the end of the input, can only start the parsers without a prediction.
+    unpredicted = tuple(parser for parser, first in zip(parsers, predict) if first is None)
+    candidates = {char: tuple(parser for parser, first in zip(parsers, predict) if first is None or char in first)
+                  for first in predict if first is not None for char in first}
+
+    def any_of_parser(in_str: str, pos: int = 0) -> ParseResultAny:
+        for parser in candidates.get(in_str[pos:pos + 1], unpredicted):
+            success, result, end = parser(in_str, pos)
             if success:
-                return success, result, rest
-        return not at_least_one, None, in_str
+                return success, result, end
+        return not at_least_one, None, pos
 
-    return any_of_parser
+    return _describe(any_of_parser, 'any_of', parsers, at_least_one=at_least_one, predict=predict)
 
 
-def transform(parser: ParserAny, transformer: Callable[[Any], Any]) -> ParserAny:
-    """Returns a parser that performs the given transformation on the result of another parser.
+def transform(parser: ParserAny, transformer: Callable[[Any], Any], *, safe: bool = False,
+              validator: Optional[Callable[[Any], bool]] = None) -> ParserAny:
+    """Returns a parser that performs the given transformation on the result of another parser. If the transformer
+    raises an exception, the new parser fails instead.
     :param parser: The parser to be acted on.
     :param transformer: A callable taking one argument and returning a value. This will be applied to the result of the
      input parser.
+    :param safe: Keyword argument only. If ``True``, the transformer is trusted never to raise for any result of the
+     input parser, so it is called without guarding against exceptions; any exception it does raise propagates. Defaults
+     to ``False``.
+    :param validator: Keyword argument only. If given, a callable taking the result of the input parser and returning
+     whether it can be transformed; when it returns ``False``, the new parser fails without calling the transformer.
+     Checking up front is much cheaper than raising and catching an exception, so together with ``safe`` it lets a
+     transformer that only raises for bad input skip the guard entirely. Defaults to ``None``, checking nothing.
     :returns: A new parser, whose result is the result of the input parser after transformation. Fails when the input
      parser fails."""
+    if validator is not None and safe:
+        def transform_parser(in_str: str, pos: int = 0) -> ParseResultAny:
+            success, result, end = parser(in_str, pos)
+            if success and validator(result):
+                return True, transformer(result), end
+            return False, None, pos
+
+    elif validator is not None:
+        def transform_parser(in_str: str, pos: int = 0) -> ParseResultAny:
+            success, result, end = parser(in_str, pos)
+            if success and validator(result):
+                try:
+                    return True, transformer(result), end
+                except Exception:
+                    pass
+            return False, None, pos
+
+    elif safe:
+        def transform_parser(in_str: str, pos: int = 0) -> ParseResultAny:
+            success, result, end = parser(in_str, pos)
+            if success:
+                return True, transformer(result), end
+            return False, None, pos
 
-    def transform_parser(in_str: str) -> ParseResultAny:
-        success, result, rest = parser(in_str)
-        if success:
-            try:
-                result = transformer(result)
-            except Exception:
-                return False, None, in_str
-        return success, result, rest
+    else:
+        def transform_parser(in_str: str, pos: int = 0) -> ParseResultAny:
+            success, result, end = parser(in_str, pos)
+            if success:
+                try:
+                    return True, transformer(result), end
+                except Exception:
+                    pass
+            return False, None, pos
 
-    return transform_parser
+    return _describe(transform_parser, 'transform', (parser,), transformer=transformer, safe=safe, validator=validator)
 
 
 def ignore_whitespace(parser: ParserAny,
                       ignore_whitespace_type: IgnoreWhitespaceType = IgnoreWhitespaceType.BEFORE) -> ParserAny:
     """Returns a parser that is identical to the given parser, except it consumes and discards all whitespace before,
-    after, or both (by default, only before). This is achieved using the ``all_whitespace`` parser.
+    after, or both (by default, only before). Whitespace is anything ``all_whitespace`` would match. Throws
+    ``ValueError`` if ``ignore_whitespace_type`` isn't an ``IgnoreWhitespaceType``.
+
+    **NOTE:** When the type is known up front, prefer ``ignore_whitespace_before``, ``ignore_whitespace_after`` or
+    ``ignore_whitespace_around``, which this dispatches to.
     :param parser: The parser to be acted on.
     :param ignore_whitespace_type: An enum describing where whitespace should be ignored.
     :returns: A new parser, whose result is only the result of the input parser, with leading and/or trailing whitespace
      excluded."""
+    if ignore_whitespace_type is IgnoreWhitespaceType.BEFORE:
+        return ignore_whitespace_before(parser)
+    if ignore_whitespace_type is IgnoreWhitespaceType.AFTER:
+        return ignore_whitespace_after(parser)
+    if ignore_whitespace_type is IgnoreWhitespaceType.AROUND:
+        return ignore_whitespace_around(parser)
+    raise ValueError(f'Unknown {IgnoreWhitespaceType.__name__}: {ignore_whitespace_type!r}')
+
+
+def ignore_whitespace_before(parser: ParserAny) -> ParserAny:
+    """Returns a parser that is identical to the given parser, except it first consumes and discards all whitespace.
+    Same as ``ignore_whitespace`` with ``IgnoreWhitespaceType.BEFORE``.
+    :param parser: The parser to be acted on.
+    :returns: A new parser, whose result is only the result of the input parser, with leading whitespace excluded."""
+
+    def ignore_whitespace_parser(in_str: str, pos: int = 0) -> ParseResultAny:
+        # Past the end of the input the match is clamped back to the end, so it is never allowed to go back before pos.
+        skipped = _match_whitespace(in_str, pos).end()
+        success, result, end = parser(in_str, skipped if skipped > pos else pos)
+        if not success:
+            return False, None, pos
+        return True, result, end
 
-    def ignore_whitespace_parser(in_str: str) -> ParseResultAny:
-        rest = in_str
-        if ignore_whitespace_type in (IgnoreWhitespaceType.BEFORE, IgnoreWhitespaceType.AROUND):
-            _, _, rest = all_whitespace(rest)
+    return _describe(ignore_whitespace_parser, 'ignore_whitespace', (parser,),
+                     ignore_whitespace_type=IgnoreWhitespaceType.BEFORE)
 
-        success, result, rest = parser(rest)
 
-        # If it failed, just end now
+def ignore_whitespace_after(parser: ParserAny) -> ParserAny:
+    """Returns a parser that is identical to the given parser, except it then consumes and discards all whitespace.
+    Same as ``ignore_whitespace`` with ``IgnoreWhitespaceType.AFTER``.
+    :param parser: The parser to be acted on.
+    :returns: A new parser, whose result is only the result of the input parser, with trailing whitespace excluded."""
+
+    def ignore_whitespace_parser(in_str: str, pos: int = 0) -> ParseResultAny:
+        success, result, end = parser(in_str, pos)
         if not success:
-            return False, None, in_str
+            return False, None, pos
+        skipped = _match_whitespace(in_str, end).end()
+        return True, result, skipped if skipped > end else end
 
-        if ignore_whitespace_type in (IgnoreWhitespaceType.AFTER, IgnoreWhitespaceType.AROUND):
-            _, _, rest = all_whitespace(rest)
+    return _describe(ignore_whitespace_parser, 'ignore_whitespace', (parser,),
+                     ignore_whitespace_type=IgnoreWhitespaceType.AFTER)
 
-        return True, result, rest
 
-    return ignore_whitespace_parser
+def ignore_whitespace_around(parser: ParserAny) -> ParserAny:
+    """Returns a parser that is identical to the given parser, except it consumes and discards all whitespace both
+    before and after. Same as ``ignore_whitespace`` with ``IgnoreWhitespaceType.AROUND``.
+    :param parser: The parser to be acted on.
+    :returns: A new parser, whose result is only the result of the input parser, with leading and trailing whitespace
+     excluded."""
+
+    def ignore_whitespace_parser(in_str: str, pos: int = 0) -> ParseResultAny:
+        skipped = _match_whitespace(in_str, pos).end()
+        success, result, end = parser(in_str, skipped if skipped > pos else pos)
+        if not success:
+            return False, None, pos
+        skipped = _match_whitespace(in_str, end).end()
+        return True, result, skipped if skipped > end else end
+
+    return _describe(ignore_whitespace_parser, 'ignore_whitespace', (parser,),
+                     ignore_whitespace_type=IgnoreWhitespaceType.AROUND)
 
 
 def fails(parser: ParserAny) -> ParserNone:
     """Returns a parser that succeeds if the input parser fails. As a consequence, this parser always returns no result
-    and the entire input string.
+    and never consumes any input.
     :param parser: The parser to be acted on.
     :returns: A parser that returns nothing, but succeeds when the input parser fails, and vice-versa."""
 
-    def fails_parser(in_str: str) -> ParseResultNone:
-        success, _, _ = parser(in_str)
-        return not success, None, in_str
+    def fails_parser(in_str: str, pos: int = 0) -> ParseResultNone:
+        success, _, _ = parser(in_str, pos)
+        return not success, None, pos
 
-    return fails_parser
+    return _describe(fails_parser, 'fails', (parser,))
 
 
-def finalize(parser: ParserAny, *, allow_unparsed_remaining: bool = False) -> ParserFinalized:
+# The input and memo table of the parse being run by a parser finalized with ``memoize=True``, if any; see ``memoize``.
+# The table maps each position of that input to a dict from memoized parser to its result there.
+_memo_table: ContextVar[Optional[tuple[str, dict[int, dict]]]] = ContextVar('_memo_table', default=None)
+
+
+def memoize(parser: ParserAny) -> ParserAny:
+    """Returns a parser that is identical to the given parser, except it remembers its result at each position of the
+    input, so that parsing again at the same position (e.g. when ``any_of`` backtracks into another alternative starting
+    with the same parser) returns the remembered result instead of parsing again. This is packrat parsing, which keeps
+    grammars with a lot of backtracking from taking exponential time.
+
+    While a parser finalized with ``memoize=True`` is running, results for its input are remembered in a table belonging
+    to that one parse, which is dropped when it finishes. Otherwise, results are remembered only for the most recent
+    input string; parsing a different string starts over. Either way, results are only ever returned for the string they
+    were parsed from, so the new parser can be shared between threads. The input parser must always give the same result
+    for the same input and position.
+    :param parser: The parser to be acted on.
+    :returns: A new parser, which gives the same results as the input parser."""
+    # The most recent input string with the cache of results for it, swapped as one tuple so that a call always stores
+    # its result in the cache of the string it parsed, even if another thread has moved on to another string meanwhile.
+    latest = (None, {})
+
+    def memoize_parser(in_str: str, pos: int = 0) -> ParseResultAny:
+        nonlocal latest
+        memo = _memo_table.get()
+        # The table only holds results for the input of the finalized parse, not for any other string parsed meanwhile
+        # (e.g. by a transformer parsing part of its result).
+        if memo is not None and memo[0] is in_str:
+            table = memo[1]
+            entries = table.get(pos)
+            if entries is None:
+                entries = table[pos] = {}
+            result = entries.get(memoize_parser)
+            if result is None:
+                result = entries[memoize_parser] = parser(in_str, pos)
+            return result
+
+        source, cache = latest
+        if source is not in_str:
+            cache = {}
+            latest = (in_str, cache)
+        result = cache.get(pos)
+        if result is None:
+            result = cache[pos] = parser(in_str, pos)
+        return result
+
+    return _describe(memoize_parser, 'memoize', (parser,))
+
+
+def finalize(parser: ParserAny, *, allow_unparsed_remaining: bool = False, memoize: bool = False,
+             cache_size: int = 0) -> ParserFinalized:
     """Returns a parser that returns *ONLY* the result and throws an error if either the parse failed or any unparsed
-    input remains. Optionally, unparsed input may be allowed.
+    input remains. Optionally, unparsed input may be allowed. Unlike every other parser, the returned parser takes only
+    the input string, and always starts parsing from its beginning.
     :param parser: The parser to be acted on.
     :param allow_unparsed_remaining: Keyword argument only. If ``True``, no error is thrown if unparsed input remains
      after the input parser has been executed. Defaults to ``False``.
+    :param memoize: Keyword argument only. If ``True``, every combinator used more than once in the tree of the input
+     parser is wrapped with ``memoize``. Terminal parsers are never wrapped, since they are cheaper to run again than to
+     look up. The remembered results only last for one call of the returned parser. Leave this off if any transformer
+     in the tree has side effects, or if results are mutated while parsing, since a memoized parser runs at most once
+     per position and returns the very same result object every time. Defaults to ``False``.
+    :param cache_size: Keyword argument only. If greater than ``0``, the results for up to this many of the most
+     recently parsed input strings are kept, and parsing the same input again returns a deep copy of the kept result
+     instead of parsing it again. Inputs that fail to parse are not kept. Defaults to ``0``, keeping nothing.
     :returns: A parser whose only return value is the result of the input parser, and possibly throws a ``ValueError``
      if the input cannot be parsed or if unparsed input remains."""
-
-    def finalize_parser(in_str: str) -> Optional[Any]:
-        success, result, rest = parser(in_str)
-        if not success:
-            raise ValueError(f'Input could not be parsed: {in_str!r}')
-        if len(rest) != 0 and not allow_unparsed_remaining:
-            raise ValueError(f'Unparsed input remained in a finalized parser: result={result!r}, rest={rest!r}')
-        return result
+    if memoize:
+        uses = {}
+        _count_uses(parser, uses)
+        parser = _memoize_shared(parser, uses, {})
+
+    if memoize:
+        def finalize_parser(in_str: str) -> Optional[Any]:
+            # A fresh memo table, shared by every memoized parser for this parse only, dropped as soon as it's over.
+            token = _memo_table.set((in_str, {}))
+            try:
+                success, result, pos = parser(in_str, 0)
+            finally:
+                _memo_table.reset(token)
+            if success and (pos == len(in_str) or allow_unparsed_remaining):
+                return result
+            _finalize_failed(in_str, success, result, pos)
+    else:
+        def finalize_parser(in_str: str) -> Optional[Any]:
+            success, result, pos = parser(in_str, 0)
+            if success and (pos == len(in_str) or allow_unparsed_remaining):
+                return result
+            _finalize_failed(in_str, success, result, pos)
+
+    if cache_size > 0:
+        cached_parser = functools.lru_cache(maxsize=cache_size)(finalize_parser)
+
+        def finalize_parser(in_str: str) -> Optional[Any]:
+            # Copied so that a caller mutating its result can't change what later calls get.
+            return copy.deepcopy(cached_parser(in_str))
 
     return finalize_parser
 
 
+def _finalize_failed(in_str: str, success: bool, result: Any, pos: int) -> NoReturn:
+    """Raises the error for a finalized parser whose input failed to parse, or was only partly parsed. Kept apart from
+    ``finalize`` so the successful path stays as short as possible."""
+    if not success:
+        raise ValueError(f'Input could not be parsed: {in_str!r}')
+    raise ValueError(f'Unparsed input remained in a finalized parser: result={result!r}, rest={in_str[pos:]!r}')
+
+
+def _count_uses(parser: ParserAny, uses: dict[int, int]) -> None:
+    """Counts how many times each parser is referenced in the tree rooted at the given parser."""
+    uses[id(parser)] = uses.get(id(parser), 0) + 1
+    if uses[id(parser)] == 1:
+        for child in getattr(parser, '_children', ()):
+            _count_uses(child, uses)
+
+
+def _memoize_shared(parser: ParserAny, uses: dict[int, int], rebuilt: dict[int, ParserAny]) -> ParserAny:
+    """Rebuilds the tree rooted at the given parser with every combinator that is used more than once memoized."""
+    if id(parser) in rebuilt:
+        return rebuilt[id(parser)]
+    kind = getattr(parser, '_kind', None)
+    if kind is None:
+        return parser
+
+    children = tuple(_memoize_shared(child, uses, rebuilt) for child in parser._children)
+    new_parser = parser
+    if any(new is not old for new, old in zip(children, parser._children)):
+        new_parser = _COMBINATORS[kind](*children, **parser._options)
+    if uses[id(parser)] > 1 and kind != 'memoize':
+        new_parser = memoize(new_parser)
+    rebuilt[id(parser)] = new_parser
+    return new_parser
+
+
+_COMBINATORS = {combinator.__name__: combinator for combinator in (
+    star, star_join, optional, chain, chain_join, any_of, transform, ignore_whitespace, fails, memoize
+)}
+
+
 # GENERATORS ===========================================================================================================
 
 def take_n(n: int) -> ParserString:
-    """Returns a parser that takes the first n characters of the input. Fails if fewer characters remain.
+    """Returns a parser that takes the next n characters of the input. Fails if fewer characters remain.
     :param n: The number of characters to take from the input.
     :returns: A new parser."""
 
-    def take_n_parser(in_str: str) -> ParseResultString:
-        if len(in_str) >= n:
-            return True, in_str[:n], in_str[n:]
-        return False, None, in_str
+    def take_n_parser(in_str: str, pos: int = 0) -> ParseResultString:
+        if len(in_str) - pos >= n:
+            return True, in_str[pos:pos + n], pos + n
+        return False, None, pos
 
     return take_n_parser
 
 
 def get_char_in(character_set: str) -> ParserString:
-    """Returns a parser that takes the first character, if it appears in the given string.
+    """Returns a parser that takes the next character, if it appears in the given string.
     :param character_set: The list of characters that the output parser should consider.
     :returns: A new parser."""
+    charset = frozenset(character_set)
 
-    def get_in_parser(in_str: str) -> ParseResultString:
-        if len(in_str) > 0 and in_str[0] in character_set:
-            return True, in_str[0], in_str[1:]
-        return False, None, in_str
+    def get_in_parser(in_str: str, pos: int = 0) -> ParseResultString:
+        if pos < len(in_str) and in_str[pos] in charset:
+            return True, in_str[pos], pos + 1
+        return False, None, pos
 
+    if charset:
+        # Marks a single-character terminal with the regex class it accepts: its result is always exactly the one
+        # character it consumed. See ``star``.
+        get_in_parser._char_class = f"[{re.escape(''.join(sorted(charset)))}]"
     return get_in_parser
 
 
 def get(prefix: str) -> ParserString:
-    """Returns a parser that extracts the given string from the beginning of the input, if present.
+    """Returns a parser that extracts the given string from the current position of the input, if present.
     :param prefix: The string to search for.
-    :returns: A parser that extracts the given string from the beginning of the input, if present."""
+    :returns: A parser that extracts the given string from the current position of the input, if present."""
+    length = len(prefix)
+
+    if length == 1:
+        # Single characters (signs, brackets, separators...) are common, and comparing one is faster than startswith.
+        def get_parser(in_str: str, pos: int = 0) -> ParseResultString:
+            if pos < len(in_str) and in_str[pos] == prefix:
+                return True, prefix, pos + 1
+            return False, None, pos
+
+        return get_parser
 
-    def get_parser(in_str: str) -> ParseResultString:
-        if in_str.startswith(prefix):
-            return True, prefix, in_str[len(prefix):]
-        return False, None, in_str
+    if length <= 3:
+        # For short prefixes, slicing and comparing is still cheaper than the startswith method call.
+        def get_parser(in_str: str, pos: int = 0) -> ParseResultString:
+            if in_str[pos:pos + length] == prefix:
+                return True, prefix, pos + length
+            return False, None, pos
+
+        return get_parser
+
+    def get_parser(in_str: str, pos: int = 0) -> ParseResultString:
+        if in_str.startswith(prefix, pos):
+            return True, prefix, pos + length
+        return False, None, pos
 
     return get_parser
 
 
 # PARSERS ==============================================================================================================
 
+_DIGIT = get_char_in('0123456789')
+
 
-def digit(in_str: str) -> ParseResultString:
-    """Gets the first character of the string if numeric.
+def digit(in_str: str, pos: int = 0) -> ParseResultString:
+    """Gets the next character of the string if numeric.
     :param in_str: The input string being parsed.
+    :param pos: The position in the input at which to start parsing. Defaults to ``0``.
     :returns: A tuple whose first element is a boolean representing if the parser succeeded, the second element is the
-     result of the parser, and the third element is the remaining unparsed input. If this parser fails, its second
-     element will be ``None`` and its third element will be the entire input."""
-    return get_char_in('0123456789')(in_str)
+     result of the parser, and the third element is the position after the parsed input. If this parser fails, its
+     second element will be ``None`` and its third element will be ``pos``."""
+    return _DIGIT(in_str, pos)
 
 
-def single_whitespace(in_str: str) -> ParseResultString:
-    """Gets the first character of the string if it is whitespace.
+digit._char_class = _DIGIT._char_class
+
+
+def single_whitespace(in_str: str, pos: int = 0) -> ParseResultString:
+    """Gets the next character of the string if it is whitespace.
     :param in_str: The input string being parsed.
+    :param pos: The position in the input at which to start parsing. Defaults to ``0``.
     :returns: A tuple whose first element is a boolean representing if the parser succeeded, the second element is the
-     result of the parser, and the third element is the remaining unparsed input. If this parser fails, its second
-     element will be ``None`` and its third element will be the entire input."""
-    if len(in_str) > 0 and in_str[0].isspace():
-        return True, in_str[0], in_str[1:]
-    return False, None, in_str
+     result of the parser, and the third element is the position after the parsed input. If this parser fails, its
+     second element will be ``None`` and its third element will be ``pos``."""
+    if pos < len(in_str):
+        char = in_str[pos]
+        if char.isspace():
+            return True, char, pos + 1
+    return False, None, pos
 
 
-def all_whitespace(in_str: str) -> ParseResultString:
-    """Gets as much whitespace as possible (including none) from the beginning of the string.
-    :param in_str: The input string being parsed.
-    :returns: A tuple whose first element is a boolean representing if the parser succeeded (which is always ``True`` in
-     this case), the second element is the result of the parser, and the third element is the
-     remaining unparsed input."""
-    return transform(star(single_whitespace), lambda x: ''.join(x))(in_str)
+single_whitespace._char_class = r'\s'
 
 
-def eof(in_str: str) -> ParseResultNone:
-    """"Parses" EOF. That is, succeeds if the input string is empty. Never returns a result.
+def all_whitespace(in_str: str, pos: int = 0) -> ParseResultString:
+    """Gets as much whitespace as possible (including none) from the current position of the string.
+    :param in_str: The input string being parsed.
+    :param pos: The position in the input at which to start parsing. Defaults to ``0``.
+    :returns: A tuple whose first element is a boolean representing if the parser succeeded (which is always ``True`` in
+     this case), the second element is the result of the parser, and the third element is the position after the
+     parsed input."""
+    match = _WS_RE.match(in_str, pos)
+    end = match.end()
+    if end > pos:
+        return True, match.group(), end
+    # No whitespace. Past the end of the input the match is clamped back to the end, so pos is kept instead.
+    return True, '', pos
+
+
+def eof(in_str: str, pos: int = 0) -> ParseResultNone:
+    """"Parses" EOF. That is, succeeds if no input remains after ``pos``. Never returns a result.
     :param in_str: The input string being parsed.
+    :param pos: The position in the input at which to start parsing. Defaults to ``0``.
     :returns: A tuple whose first element is a boolean representing if the parser succeeded, the second element is
-     ``None``, and the third element is the unparsed input."""
-    return in_str == '', None, in_str
+     ``None``, and the third element is ``pos``."""
+    return pos >= len(in_str), None, pos
 
 
-def noop(in_str: str) -> ParseResultNone:
+def noop(in_str: str, pos: int = 0) -> ParseResultNone:
     """Does nothing, but succeeds.
     :param in_str: The input string being parsed.
-    :returns: A tuple of: ``True``, ``None``, ``in_str``"""
-    return True, None, in_str
+    :param pos: The position in the input at which to start parsing. Defaults to ``0``.
+    :returns: A tuple of: ``True``, ``None``, ``pos``"""
+    return True, None, pos
 
 
-def parse_int(in_str: str) -> ParseResultInt:
-    """Parses an integer from the beginning of the input.
+def parse_int(in_str: str, pos: int = 0) -> ParseResultInt:
+    """Parses an integer from the current position of the input.
     :param in_str: The input string being parsed.
+    :param pos: The position in the input at which to start parsing. Defaults to ``0``.
     :returns: A tuple whose first element is a boolean representing if the parser succeeded, the second element is the
-     result of the parser, and the third element is the remaining unparsed input. If this parser fails, its second
-     element will be ``None`` and its third element will be the entire input."""
-    int_parser = transform(
-        chain_join(
-            any_of(get('-'), get('+'), at_least_one=False),
-            star_join(digit)
-        ),
-        int
-    )
-    return int_parser(in_str)
+     result of the parser, and the third element is the position after the parsed input. If this parser fails, its
+     second element will be ``None`` and its third element will be ``pos``."""
+    match = _INT_RE.match(in_str, pos)
+    if match:
+        return True, int(match.group()), match.end()
+    return False, None, pos
+
+
+# COMPILATION ==========================================================================================================
+
+_compiled_parsers = weakref.WeakKeyDictionary()
+# Numbers the source of each compiled parser, so each gets its own ``linecache`` entry; see ``_ParserCompiler.compile``.
+_compiled_sources = itertools.count(1)
+
+_INLINE_KINDS = frozenset(('star', 'star_join', 'optional', 'chain', 'chain_join', 'any_of', 'transform',
+                           'ignore_whitespace', 'fails'))
+
+
+def compile_parser(parser: ParserAny) -> ParserAny:
+    """Returns a parser equivalent to the given one, with its whole tree of combinators fused into a single generated
+    function. Every combinator normally costs a Python call and a tuple unpack per level of the tree; the compiled
+    parser runs the same steps as straight-line code, only calling out to the terminal parsers (and to any custom
+    parsers it can't see into). Meant for grammars that are built once and then used many times.
+
+    Parsers used more than once in the tree are compiled separately and called, rather than inlined at every use. If
+    the tree is too deeply nested to compile, the input parser is returned unchanged. Results are cached per parser.
+    :param parser: The parser to be compiled.
+    :returns: A new parser, which gives the same results as the input parser."""
+    compiled = _compiled_parsers.get(parser)
+    if compiled is not None:
+        return compiled
+    if getattr(parser, '_kind', None) not in _INLINE_KINDS:
+        return parser
+
+    try:
+        compiled = _ParserCompiler(parser).compile()
+    except (SyntaxError, RecursionError):
+        return parser
+    _compiled_parsers[parser] = compiled
+    return compiled
+
+
+class _ParserCompiler:
+    """Generates the source of a single function running a whole parser tree, for ``compile_parser``."""
+
+    def __init__(self, root: ParserAny):
+        self.root = root
+        self.lines = ['def compiled_parser(in_str, pos=0):']
+        self.bindings = {'_match_whitespace': _match_whitespace}
+        self.uses = {}
+        self.next_id = 0
+        _count_uses(root, self.uses)
+
+    def compile(self) -> ParserAny:
+        self.emit(self.root, 'pos', 'end', 1)
+        self.lines.append('    return ok, res, end')
+        filename = f'<functionalparser compiled {self.root.__name__} #{next(_compiled_sources)}>'
+        factory = _generate_factory(filename, self.lines, list(self.bindings), 'compiled_parser')
+        compiled = factory(**self.bindings)
+        # Its source only needs to stay in the line cache for as long as it can appear in a traceback.
+        weakref.finalize(compiled, linecache.cache.pop, filename, None).atexit = False
+        return compiled
+
+    def bind(self, value: Any) -> str:
+        """Makes the value available to the generated code, returning the name it is bound to."""
+        name = f'_v{len(self.bindings)}'
+        self.bindings[name] = value
+        return name
+
+    def new_id(self) -> int:
+        self.next_id += 1
+        return self.next_id
+
+    def line(self, depth: int, text: str) -> None:
+        self.lines.append('    ' * depth + text)
+
+    def emit(self, parser: ParserAny, start: str, end: str, depth: int) -> None:
+        """Appends the source running the given parser from the position held in the variable ``start``. Afterwards,
+        the variables ``ok`` and ``res`` hold its status and result, and the variable ``end`` holds its end position
+        (which is ``start`` on failure, just like any other parser)."""
+        kind = getattr(parser, '_kind', None)
+
+        if kind not in _INLINE_KINDS or (parser is not self.root and self.uses[id(parser)] > 1):
+            # Terminals, custom parsers, and shared subtrees are called rather than inlined.
+            if kind in _INLINE_KINDS:
+                parser = compile_parser(parser)
+            self.line(depth, f'ok, res, {end} = {self.bind(parser)}(in_str, {start})')
+            return
+
+        uid = self.new_id()
+        children = parser._children
+        options = parser._options
+
+        if kind == 'optional':
+            self.emit(children[0], start, end, depth)
+            self.line(depth, 'ok = True')
+
+        elif kind == 'fails':
+            self.emit(children[0], start, f'_{uid}', depth)
+            self.line(depth, f'ok, res, {end} = not ok, None, {start}')
+
+        elif kind == 'transform':
+            self.emit(children[0], start, end, depth)
+            if options['validator'] is not None:
+                self.line(depth, f'if ok and not {self.bind(options["validator"])}(res):')
+                self.line(depth + 1, f'ok, res, {end} = False, None, {start}')
+            self.line(depth, 'if ok:')
+            transformer = self.bind(options['transformer'])
+            if options['safe']:
+                self.line(depth + 1, f'res = {transformer}(res)')
+            else:
+                self.line(depth + 1, 'try:')
+                self.line(depth + 2, f'res = {transformer}(res)')
+                self.line(depth + 1, 'except Exception:')
+                self.line(depth + 2, f'ok, res, {end} = False, None, {start}')
+            self.line(depth, 'else:')
+            self.line(depth + 1, f'res, {end} = None, {start}')
+
+        elif kind in ('star', 'star_join') and getattr(children[0], '_char_class', None) is not None:
+            match_run = self.bind(re.compile(f'{children[0]._char_class}*').match)
+            self.line(depth, f'{end} = {match_run}(in_str, {start}).end()')
+            self.line(depth, f'if {end} < {start}:')
+            self.line(depth + 1, f'{end} = {start}')
+            run = f'in_str[{start}:{end}]'
+            self.line(depth, f'ok, res = True, {run}' if kind == 'star_join' else f'ok, res = True, list({run})')
+
+        elif kind in ('star', 'star_join'):
+            self.line(depth, f'items_{uid} = []')
+            self.line(depth, f'{end} = {start}')
+            self.line(depth, 'while True:')
+            self.emit(children[0], end, f'next_{uid}', depth + 1)
+            self.line(depth + 1, f'if not ok or next_{uid} == {end}:')
+            self.line(depth + 2, 'break')
+            self.line(depth + 1, f'items_{uid}.append(res)')
+            self.line(depth + 1, f'{end} = next_{uid}')
+            joined = f"''.join(items_{uid})" if kind == 'star_join' else f'items_{uid}'
+            self.line(depth, f'ok, res = True, {joined}')
+
+        elif kind in ('chain', 'chain_join'):
+            # Each step is nested in the success branch of the previous one, so a failure skips straight to the end.
+            self.line(depth, f'{end} = {start}')
+            position = start
+            for i, child in enumerate(children):
+                self.emit(child, position, f'p{uid}_{i}', depth + i)
+                self.line(depth + i, 'if ok:')
+                self.line(depth + i + 1, f'r{uid}_{i} = res')
+                position = f'p{uid}_{i}'
+            inner = depth + len(children)
+            results = ', '.join(f'r{uid}_{i}' for i in range(len(children)))
+            if kind == 'chain_join':
+                self.line(inner, f"res = ''.join([r for r in ({results},) if r is not None])")
+            elif options['skip_none_result']:
+                self.line(inner, f'res = [r for r in ({results},) if r is not None]')
+            else:
+                self.line(inner, f'res = [{results}]')
+            self.line(inner, f'{end} = {position}')
+            self.line(depth, 'if not ok:')
+            self.line(depth + 1, 'res = None')
+
+        elif kind == 'any_of' and options['predict'] is not None:
+            # Each alternative is tried if every earlier one failed, and the next character can start it.
+            self.line(depth, f'ok, res, {end} = False, None, {start}')
+            self.line(depth, f'next_{uid} = in_str[{start}:{start} + 1]')
+            for child, first in zip(children, options['predict']):
+                condition = 'not ok' if first is None else f'not ok and next_{uid} in {self.bind(frozenset(first))}'
+                self.line(depth, f'if {condition}:')
+                self.emit(child, start, end, depth + 1)
+            self.line(depth, 'if not ok:')
+            self.line(depth + 1, f'ok, res, {end} = {not options["at_least_one"]}, None, {start}')
+
+        elif kind == 'any_of':
+            # Each alternative is tried in the failure branch of the previous one.
+            for i, child in enumerate(children):
+                if i > 0:
+                    self.line(depth + i - 1, 'if not ok:')
+                self.emit(child, start, end, depth + i)
+            self.line(depth, 'if not ok:')
+            self.line(depth + 1, f'ok, res, {end} = {not options["at_least_one"]}, None, {start}')
+
+        elif kind == 'ignore_whitespace':
+            whitespace_type = options['ignore_whitespace_type']
+            self.line(depth, f'ws_{uid} = {start}')
+            if whitespace_type in (IgnoreWhitespaceType.BEFORE, IgnoreWhitespaceType.AROUND):
+                self.line(depth, f'ws_{uid} = _match_whitespace(in_str, ws_{uid}).end()')
+                self.line(depth, f'if ws_{uid} < {start}:')
+                self.line(depth + 1, f'ws_{uid} = {start}')
+            self.emit(children[0], f'ws_{uid}', end, depth)
+            self.line(depth, 'if not ok:')
+            self.line(depth + 1, f'res, {end} = None, {start}')
+            if whitespace_type in (IgnoreWhitespaceType.AFTER, IgnoreWhitespaceType.AROUND):
+                self.line(depth, 'else:')
+                self.line(depth + 1, f'ws_{uid} = _match_whitespace(in_str, {end}).end()')
+                self.line(depth + 1, f'if ws_{uid} > {end}:')
+                self.line(depth + 2, f'{end} = ws_{uid}')
@@ -1,147 +1,253 @@
+import gc
+import linecache
+import threading
 from typing import Type
 from unittest import TestCase
 
 from functionalparser import *
 
 
-def tp_take(in_str: str) -> ParseResultString:
+def tp_take(in_str: str, pos: int = 0) -> ParseResultString:
     """Defined here completely independently of the module for testing purposes."""
-    if len(in_str) > 0:
-        return True, in_str[0], in_str[1:]
-    return False, None, in_str
+    if pos < len(in_str):
+        return True, in_str[pos], pos + 1
+    return False, None, pos
 
 
 def tp_get(prefix: str) -> ParserString:
     """Defined here completely independently of the module for testing purposes."""
 
-    def tp_get_parser(in_str: str) -> ParseResultString:
-        if in_str.startswith(prefix):
-            return True, prefix, in_str[len(prefix):]
-        return False, None, in_str
+    def tp_get_parser(in_str: str, pos: int = 0) -> ParseResultString:
+        if in_str.startswith(prefix, pos):
+            return True, prefix, pos + len(prefix)
+        return False, None, pos
 
     return tp_get_parser
 
 
-def tp_int(in_str: str) -> ParseResultInt:
+def tp_int(in_str: str, pos: int = 0) -> ParseResultInt:
     """Defined here completely independently of the module for testing purposes."""
-    if len(in_str) == 0:
-        return False, None, in_str
-
-    try:
-        return True, int(in_str[0]), in_str[1:]
-    except ValueError:
-        return False, None, in_str
+    if pos < len(in_str) and '0' <= in_str[pos] <= '9':
+        return True, ord(in_str[pos]) - ord('0'), pos + 1
+    return False, None, pos
 
 
 def tp_noop(succeed: bool) -> ParserNone:
     """Defined here completely independently of the module for testing purposes."""
-    return lambda x: (succeed, None, x)
+    return lambda x, pos=0: (succeed, None, pos)
+
+
+def _split_on_space(in_str: str) -> list[str]:
+    return in_str.split(' ')
+
+
+def _twice(value: Any) -> Any:
+    return value * 2
+
+
+def _int_doubled(in_str: str) -> int:
+    return int(in_str) * 2
+
+
+def _int_range(in_str: str) -> list[int]:
+    return list(range(int(in_str)))
+
+
+_STAR_CASES: tuple[tuple[ParserAny, str, ParseResultList], ...] = (
+    (tp_take, 'test', (True, ['t', 'e', 's', 't'], 4)),
+    (tp_take, 'abc', (True, ['a', 'b', 'c'], 3)),
+    (tp_take, 'a', (True, ['a'], 1)),
+    (tp_take, '', (True, [], 0)),
+    (tp_get('test'), 'test hello', (True, ['test'], 4)),
+    (tp_get('a'), 'bbb', (True, [], 0)),
+    (tp_get('a'), 'aabbb', (True, ['a', 'a'], 2)),
+    (tp_get('ab'), 'ababbbb', (True, ['ab', 'ab'], 4)),
+)
+
+
+_STAR_JOIN_CASES: tuple[tuple[ParserString, str, ParseResultString], ...] = (
+    (tp_take, 'test', (True, 'test', 4)),
+    (tp_take, 'abc', (True, 'abc', 3)),
+    (tp_take, 'a', (True, 'a', 1)),
+    (tp_take, '', (True, '', 0)),
+    (tp_get('test'), 'test hello', (True, 'test', 4)),
+    (tp_get('a'), 'bbb', (True, '', 0)),
+    (tp_get('a'), 'aabbb', (True, 'aa', 2)),
+    (tp_get('ab'), 'ababbbb', (True, 'abab', 4)),
+)
+
+
+_OPTIONAL_CASES: tuple[tuple[ParserString, str, ParseResultList], ...] = (
+    (tp_take, '', (True, None, 0)),
+    (tp_take, 'a', (True, 'a', 1)),
+    (tp_get('test'), 'testtest', (True, 'test', 4)),
+    (tp_get('test'), 'hellotest', (True, None, 0)),
+    (tp_get('a'), 'ab', (True, 'a', 1)),
+    (tp_get('a'), 'ba', (True, None, 0)),
+)
+
+
+_CHAIN_CASES: tuple[tuple[list[ParserAny], Optional[bool], str, ParseResultList], ...] = (
+    ([tp_take, tp_get('test')], False, 'atestb', (True, ['a', 'test'], 5)),
+    ([tp_take, tp_get('test')], False, 'atest', (True, ['a', 'test'], 5)),
+    ([tp_take, tp_get('test')], False, 'ab', (False, None, 0)),
+    ([tp_get('a'), tp_get('b'), tp_get('c')], False, 'abc', (True, ['a', 'b', 'c'], 3)),
+    ([tp_get('a'), tp_noop(True), tp_get('b')], True, 'abc', (True, ['a', 'b'], 2)),
+    ([tp_get('a'), tp_noop(True), tp_get('b')], False, 'abc', (True, ['a', None, 'b'], 2)),
+    ([tp_get('a'), tp_noop(True), tp_get('b')], None, 'abc', (True, ['a', None, 'b'], 2)),
+    ([tp_get('a'), tp_get('b'), tp_get('c')], False, 'abc.', (True, ['a', 'b', 'c'], 3)),
+    ([tp_get('a'), tp_get('b'), tp_get('c')], False, '_bc.', (False, None, 0)),
+    ([tp_get('a'), tp_get('b'), tp_get('c')], False, 'a_c.', (False, None, 0)),
+    ([tp_get('a'), tp_get('b'), tp_get('c')], False, 'ab_.', (False, None, 0)),
+)
+
+
+_CHAIN_JOIN_CASES: tuple[tuple[list[ParserString], str, ParseResultString], ...] = (
+    ([tp_take, tp_get('test')], 'atestb', (True, 'atest', 5)),
+    ([tp_take, tp_take], 'atestb', (True, 'at', 2)),
+    ([tp_take, tp_take, tp_take, tp_take, tp_take], '0123456789', (True, '01234', 5)),
+    ([tp_take, tp_get('test')], 'ab', (False, None, 0)),
+    ([tp_get('a'), tp_noop(True), tp_get('b')], 'abc', (True, 'ab', 2)),
+    ([tp_get('a'), tp_noop(True), tp_get('test')], 'abc', (False, None, 0)),
+)
+
+
+_TRANSFORM_CASES: tuple[tuple[ParserAny, Callable, str, ParseResultAny], ...] = (
+    (tp_get('test test'), _split_on_space, 'test test and more', (True, ['test', 'test'], 9)),
+    (tp_get('test'), _twice, 'test test and more', (True, 'testtest', 4)),
+    (tp_take, _int_doubled, '4ab', (True, 8, 1)),
+    (tp_take, _int_doubled, '0ab', (True, 0, 1)),
+    (tp_take, _int_doubled, '1', (True, 2, 1)),
+    (tp_take, _int_range, '5tests', (True, [0, 1, 2, 3, 4], 1)),
+    (tp_take, _int_range, '5tests', (True, [0, 1, 2, 3, 4], 1)),
+)
+
+
+_FINALIZE_CASES: tuple[tuple[ParserAny, bool, str, Optional[Any], Optional[Type[Exception]]], ...] = (
+    (tp_int, False, '3', 3, None),
+    (tp_int, True, '3_ignore_this', 3, None),
+    (tp_int, False, '3_this_is_bad', None, ValueError),
+    (tp_int, True, 'what?', None, ValueError),
+    (tp_int, False, 'what?', None, ValueError),
+    (tp_get('test'), False, 'test', 'test', None),
+    (tp_get('test'), True, 'test fine', 'test', None),
+    (tp_get('test'), False, 'test nope', None, ValueError),
+    (tp_get('test'), True, 'bad', None, ValueError),
+    (tp_get('test'), False, 'bad', None, ValueError),
+)
+
+
+_ANY_OF_CASES: tuple[tuple[list[ParserAny], Optional[bool], str, ParseResultAny], ...] = (
+    ([tp_get('test'), tp_int, tp_take], True, 'test and more', (True, 'test', 4)),
+    ([tp_get('test'), tp_int, tp_take], True, '5 and more', (True, 5, 1)),
+    ([tp_get('test'), tp_int, tp_take], True, '? and more', (True, '?', 1)),
+    ([tp_get('test'), tp_int, tp_get('other')], True, '? and more', (False, None, 0)),
+    ([tp_get('test'), tp_int, tp_get('other')], False, '? and more', (True, None, 0)),
+    ([tp_get('test')], True, 'test and more', (True, 'test', 4)),
+    ([tp_get('test')], False, 'test and more', (True, 'test', 4)),
+    ([tp_get('test')], True, '? and more', (False, None, 0)),
+    ([tp_get('test')], False, '? and more', (True, None, 0)),
+)
+
+
+_FAILS_CASES: tuple[tuple[ParserAny, str, bool], ...] = (
+    (tp_take, '', True),
+    (tp_take, 'g', False),
+    (tp_take, 'ggh', False),
+    (tp_int, '5', False),
+    (tp_int, 'guh', True),
+)
 
 
 class TestCombinators(TestCase):
     def test_star(self):
-        expectations: list[tuple[ParserAny, str, ParseResultList]] = [
-            (tp_take, 'test', (True, ['t', 'e', 's', 't'], '')),
-            (tp_take, 'abc', (True, ['a', 'b', 'c'], '')),
-            (tp_take, 'a', (True, ['a'], '')),
-            (tp_take, '', (True, [], '')),
-            (tp_get('test'), 'test hello', (True, ['test'], ' hello')),
-            (tp_get('a'), 'bbb', (True, [], 'bbb')),
-            (tp_get('a'), 'aabbb', (True, ['a', 'a'], 'bbb')),
-            (tp_get('ab'), 'ababbbb', (True, ['ab', 'ab'], 'bbb')),
-        ]
-        for parser, in_str, expected in expectations:
+        for parser, in_str, expected in _STAR_CASES:
             with self.subTest(star.__name__,
                               parser=parser, in_str=in_str, expected=expected):
                 self.assertEqual(star(parser)(in_str), expected)
+        with self.subTest('when the inner parser is a single-character terminal, gives the same results'):
+            self.assertEqual(star(get_char_in('ab'))('abbac', 1), (True, ['b', 'b', 'a'], 4))
+            self.assertEqual(star(get_char_in('ab'))('c'), (True, [], 0))
+            self.assertEqual(star(get_char_in('^]-\\'))('-]^\\a'), (True, ['-', ']', '^', '\\'], 4))
+            self.assertEqual(star(get_char_in(''))('a'), (True, [], 0))
+            self.assertEqual(star(digit)('12', 5), (True, [], 5))
+            self.assertEqual(star(digit)('12', 2), (True, [], 2))
+        with self.subTest('when the inner parser succeeds without consuming input, stops'):
+            self.assertEqual(star(tp_noop(True))('ab'), (True, [], 0))
+            self.assertEqual(star(any_of(tp_get('a'), tp_noop(True)))('aab', 0), (True, ['a', 'a'], 2))
 
     def test_star_join(self):
-        expectations: list[tuple[ParserString, str, ParseResultString]] = [
-            (tp_take, 'test', (True, 'test', '')),
-            (tp_take, 'abc', (True, 'abc', '')),
-            (tp_take, 'a', (True, 'a', '')),
-            (tp_take, '', (True, '', '')),
-            (tp_get('test'), 'test hello', (True, 'test', ' hello')),
-            (tp_get('a'), 'bbb', (True, '', 'bbb')),
-            (tp_get('a'), 'aabbb', (True, 'aa', 'bbb')),
-            (tp_get('ab'), 'ababbbb', (True, 'abab', 'bbb')),
-        ]
-        for parser, in_str, expected in expectations:
+        for parser, in_str, expected in _STAR_JOIN_CASES:
             with self.subTest(star_join.__name__,
                               parser=parser, in_str=in_str, expected=expected):
                 self.assertEqual(star_join(parser)(in_str), expected)
+        with self.subTest('when the inner parser is a single-character terminal, gives the same results'):
+            self.assertEqual(star_join(get_char_in('ab'))('abbac', 1), (True, 'bba', 4))
+            self.assertEqual(star_join(get_char_in('ab'))('c'), (True, '', 0))
+            self.assertEqual(star_join(get_char_in('^]-\\'))('-]^\\a'), (True, '-]^\\', 4))
+            self.assertEqual(star_join(digit)('12', 5), (True, '', 5))
+        with self.subTest('when the inner parser succeeds without consuming input, stops'):
+            self.assertEqual(star_join(optional(tp_get('a')))('aab'), (True, 'aa', 2))
 
     def test_optional(self):
-        expectations: list[tuple[ParserString, str, ParseResultList]] = [
-            (tp_take, '', (True, None, '')),
-            (tp_take, 'a', (True, 'a', '')),
-            (tp_get('test'), 'testtest', (True, 'test', 'test')),
-            (tp_get('test'), 'hellotest', (True, None, 'hellotest')),
-            (tp_get('a'), 'ab', (True, 'a', 'b')),
-            (tp_get('a'), 'ba', (True, None, 'ba')),
-        ]
-        for parser, in_str, expected in expectations:
+        for parser, in_str, expected in _OPTIONAL_CASES:
             with self.subTest(optional.__name__,
                               parser=parser, in_str=in_str, expected=expected):
                 self.assertEqual(optional(parser)(in_str), expected)
 
     def test_chain(self):
-        expectations: list[tuple[list[ParserAny], Optional[bool], str, ParseResultList]] = [
-            ([tp_take, tp_get('test')], False, 'atestb', (True, ['a', 'test'], 'b')),
-            ([tp_take, tp_get('test')], False, 'atest', (True, ['a', 'test'], '')),
-            ([tp_take, tp_get('test')], False, 'ab', (False, None, 'ab')),
-            ([tp_get('a'), tp_get('b'), tp_get('c')], False, 'abc', (True, ['a', 'b', 'c'], '')),
-            ([tp_get('a'), tp_noop(True), tp_get('b')], True, 'abc', (True, ['a', 'b'], 'c')),
-            ([tp_get('a'), tp_noop(True), tp_get('b')], False, 'abc', (True, ['a', None, 'b'], 'c')),
-            ([tp_get('a'), tp_noop(True), tp_get('b')], None, 'abc', (True, ['a', None, 'b'], 'c')),
-            ([tp_get('a'), tp_get('b'), tp_get('c')], False, 'abc.', (True, ['a', 'b', 'c'], '.')),
-            ([tp_get('a'), tp_get('b'), tp_get('c')], False, '_bc.', (False, None, '_bc.')),
-            ([tp_get('a'), tp_get('b'), tp_get('c')], False, 'a_c.', (False, None, 'a_c.')),
-            ([tp_get('a'), tp_get('b'), tp_get('c')], False, 'ab_.', (False, None, 'ab_.')),
-        ]
-        for parsers, skip_none, in_str, expected in expectations:
+        for parsers, skip_none, in_str, expected in _CHAIN_CASES:
             with self.subTest(chain.__name__,
                               parsers=parsers, skip_none=skip_none, in_str=in_str, expected=expected):
                 if skip_none is None:
                     self.assertEqual(chain(*parsers)(in_str), expected)
                 else:
                     self.assertEqual(chain(*parsers, skip_none_result=skip_none)(in_str), expected)
+        with self.subTest('when starting mid-input and failing, returns the starting pos'):
+            self.assertEqual(chain(tp_get('a'), tp_get('b'))('_a_', 1), (False, None, 1))
+            self.assertEqual(chain(tp_get('a'), tp_get('b'))('_ab', 1), (True, ['a', 'b'], 3))
+        with self.subTest('when called with many parsers, gives the same results'):
+            self.assertEqual(chain(*[tp_take] * 20)('a' * 21), (True, ['a'] * 20, 20))
+            self.assertEqual(chain(*[tp_take] * 20)('a' * 19), (False, None, 0))
+            self.assertEqual(chain(*[tp_noop(True), tp_take] * 10, skip_none_result=True)('a' * 10),
+                             (True, ['a'] * 10, 10))
         with self.subTest('when called with no args, ValueError is raised'):
             self.assertRaises(ValueError, chain)
 
     def test_chain_join(self):
-        expectations: list[tuple[list[ParserString], str, ParseResultString]] = [
-            ([tp_take, tp_get('test')], 'atestb', (True, 'atest', 'b')),
-            ([tp_take, tp_take], 'atestb', (True, 'at', 'estb')),
-            ([tp_take, tp_take, tp_take, tp_take, tp_take], '0123456789', (True, '01234', '56789')),
-            ([tp_take, tp_get('test')], 'ab', (False, None, 'ab')),
-            ([tp_get('a'), tp_noop(True), tp_get('b')], 'abc', (True, 'ab', 'c')),
-            ([tp_get('a'), tp_noop(True), tp_get('test')], 'abc', (False, None, 'abc')),
-        ]
-        for parsers, in_str, expected in expectations:
+        for parsers, in_str, expected in _CHAIN_JOIN_CASES:
             with self.subTest(chain_join.__name__,
                               parsers=parsers, in_str=in_str, expected=expected):
                 self.assertEqual(chain_join(*parsers)(in_str), expected)
+        with self.subTest('when called with many parsers, gives the same results'):
+            self.assertEqual(chain_join(*[tp_take, tp_noop(True)] * 10)('a' * 11), (True, 'a' * 10, 10))
+            self.assertEqual(chain_join(*[tp_take, tp_noop(True)] * 10)('a' * 9), (False, None, 0))
         with self.subTest('when called with no args, ValueError is raised'):
             self.assertRaises(ValueError, chain_join)
 
     def test_transform(self):
-        expectations: list[tuple[ParserAny, Callable, str, ParseResultAny]] = [
-            (tp_get('test test'), lambda x: x.split(' '), 'test test and more', (True, ['test', 'test'], ' and more')),
-            (tp_get('test'), lambda x: x * 2, 'test test and more', (True, 'testtest', ' test and more')),
-            (tp_take, lambda x: int(x) * 2, '4ab', (True, 8, 'ab')),
-            (tp_take, lambda x: int(x) * 2, '0ab', (True, 0, 'ab')),
-            (tp_take, lambda x: int(x) * 2, '1', (True, 2, '')),
-            (tp_take, lambda x: list(range(int(x))), '5tests', (True, [0, 1, 2, 3, 4], 'tests')),
-            (tp_take, lambda x: list(range(int(x))), '5tests', (True, [0, 1, 2, 3, 4], 'tests')),
-        ]
-        for parser, transformer, in_str, expected in expectations:
+        for parser, transformer, in_str, expected in _TRANSFORM_CASES:
             with self.subTest(transform.__name__,
                               parser=parser, transformer=transformer, in_str=in_str, expected=expected):
                 self.assertEqual(transform(parser, transformer)(in_str), expected)
         with self.subTest('when transformer raises error, fails without error'):
             in_str = 'test'
-            self.assertEqual((False, None, in_str), transform(tp_take, lambda x: int(x))(in_str))
+            self.assertEqual((False, None, 0), transform(tp_take, int)(in_str))
+        with self.subTest('when safe, gives the same results'):
+            for parser, transformer, in_str, expected in _TRANSFORM_CASES:
+                self.assertEqual(transform(parser, transformer, safe=True)(in_str), expected)
+            self.assertEqual(transform(tp_take, int, safe=True)(''), (False, None, 0))
+        with self.subTest('when safe and transformer raises error, error propagates'):
+            self.assertRaises(ValueError, transform(tp_take, int, safe=True), 'test')
+        for safe in (False, True):
+            with self.subTest(f'when given a validator and safe={safe}, gives the same results'):
+                for parser, transformer, in_str, expected in _TRANSFORM_CASES:
+                    self.assertEqual(transform(parser, transformer, safe=safe, validator=bool)(in_str), expected)
+            with self.subTest(f'when given a validator and safe={safe}, fails without transforming what it rejects'):
+                self.assertEqual(transform(tp_take, int, safe=safe, validator=str.isdigit)('x5', 0), (False, None, 0))
+                self.assertEqual(transform(tp_take, int, safe=safe, validator=str.isdigit)('x5', 1), (True, 5, 2))
+        with self.subTest('when given a validator and the transformer raises error, fails without error'):
+            self.assertEqual(transform(tp_take, int, validator=str.isalnum)('x'), (False, None, 0))
 
     def test_ignore_whitespace(self):
         wb = '  \t '
@@ -149,31 +255,41 @@ class TestCombinators(TestCase):
         wa = ' \n    \t\r\n'
         full = wb + infix + wa
         expectations: list[tuple[ParserString, str, ParseResultString]] = [
-            (ignore_whitespace(tp_get(infix), IgnoreWhitespaceType.AROUND), full, (True, infix, '')),
-            (ignore_whitespace(tp_get(infix), IgnoreWhitespaceType.BEFORE), full, (True, infix, wa)),
-            (ignore_whitespace(tp_get(infix), IgnoreWhitespaceType.AFTER), full, (False, None, full)),
-            (ignore_whitespace(tp_get(infix), IgnoreWhitespaceType.AFTER), infix + wa, (True, infix, '')),
-            (ignore_whitespace(tp_get(infix)), full, (True, infix, wa)),
+            (ignore_whitespace(tp_get(infix), IgnoreWhitespaceType.AROUND), full, (True, infix, len(full))),
+            (ignore_whitespace(tp_get(infix), IgnoreWhitespaceType.BEFORE), full, (True, infix, len(wb + infix))),
+            (ignore_whitespace(tp_get(infix), IgnoreWhitespaceType.AFTER), full, (False, None, 0)),
+            (ignore_whitespace(tp_get(infix), IgnoreWhitespaceType.AFTER), infix + wa, (True, infix, len(infix + wa))),
+            (ignore_whitespace(tp_get(infix)), full, (True, infix, len(wb + infix))),
         ]
         for parser, in_str, expected in expectations:
             with self.subTest(ignore_whitespace.__name__,
                               parser=parser, in_str=in_str, expected=expected):
                 self.assertEqual(parser(in_str), expected)
+        with self.subTest('when called with an unknown type, ValueError is raised'):
+            self.assertRaises(ValueError, ignore_whitespace, tp_get(infix), None)
 
-    def test_finalize(self):
-        expectations: list[tuple[ParserAny, bool, str, Optional[Any], Optional[Type[Exception]]]] = [
-            (tp_int, False, '3', 3, None),
-            (tp_int, True, '3_ignore_this', 3, None),
-            (tp_int, False, '3_this_is_bad', None, ValueError),
-            (tp_int, True, 'what?', None, ValueError),
-            (tp_int, False, 'what?', None, ValueError),
-            (tp_get('test'), False, 'test', 'test', None),
-            (tp_get('test'), True, 'test fine', 'test', None),
-            (tp_get('test'), False, 'test nope', None, ValueError),
-            (tp_get('test'), True, 'bad', None, ValueError),
-            (tp_get('test'), False, 'bad', None, ValueError),
+    def test_ignore_whitespace_by_type(self):
+        full = '  test \n'
+        expectations: list[tuple[ParserString, IgnoreWhitespaceType, str, int, ParseResultString]] = [
+            (ignore_whitespace_before, IgnoreWhitespaceType.BEFORE, full, 0, (True, 'test', 6)),
+            (ignore_whitespace_after, IgnoreWhitespaceType.AFTER, full, 2, (True, 'test', len(full))),
+            (ignore_whitespace_after, IgnoreWhitespaceType.AFTER, full, 0, (False, None, 0)),
+            (ignore_whitespace_around, IgnoreWhitespaceType.AROUND, full, 0, (True, 'test', len(full))),
+            (ignore_whitespace_around, IgnoreWhitespaceType.AROUND, 'x' + full, 1, (True, 'test', len(full) + 1)),
+            (ignore_whitespace_before, IgnoreWhitespaceType.BEFORE, full, 10, (False, None, 10)),
+            (ignore_whitespace_after, IgnoreWhitespaceType.AFTER, full, 10, (False, None, 10)),
+            (ignore_whitespace_around, IgnoreWhitespaceType.AROUND, full, 10, (False, None, 10)),
         ]
-        for parser, allow_remaining, in_str, expected, exception in expectations:
+        for factory, ignore_whitespace_type, in_str, pos, expected in expectations:
+            with self.subTest(factory.__name__, in_str=in_str, pos=pos, expected=expected):
+                self.assertEqual(factory(tp_get('test'))(in_str, pos), expected)
+                self.assertEqual(ignore_whitespace(tp_get('test'), ignore_whitespace_type)(in_str, pos), expected)
+        for factory in (ignore_whitespace_before, ignore_whitespace_after, ignore_whitespace_around):
+            with self.subTest(f'{factory.__name__} when starting past the end of the input, never moves backwards'):
+                self.assertEqual(factory(eof)(' ', 3), (True, None, 3))
+
+    def test_finalize(self):
+        for parser, allow_remaining, in_str, expected, exception in _FINALIZE_CASES:
             with self.subTest(finalize.__name__,
                               parser=parser, allow_remaining=allow_remaining, in_str=in_str, expected=expected,
                               exception=exception):
@@ -183,24 +299,50 @@ class TestCombinators(TestCase):
                     self.assertEqual(finalize(parser, allow_unparsed_remaining=allow_remaining)(in_str), expected)
 
     def test_any_of(self):
-        expectations: list[tuple[list[ParserAny], Optional[bool], str, ParseResultAny]] = [
-            ([tp_get('test'), tp_int, tp_take], True, 'test and more', (True, 'test', ' and more')),
-            ([tp_get('test'), tp_int, tp_take], True, '5 and more', (True, 5, ' and more')),
-            ([tp_get('test'), tp_int, tp_take], True, '? and more', (True, '?', ' and more')),
-            ([tp_get('test'), tp_int, tp_get('other')], True, '? and more', (False, None, '? and more')),
-            ([tp_get('test'), tp_int, tp_get('other')], False, '? and more', (True, None, '? and more')),
-            ([tp_get('test')], True, 'test and more', (True, 'test', ' and more')),
-            ([tp_get('test')], False, 'test and more', (True, 'test', ' and more')),
-            ([tp_get('test')], True, '? and more', (False, None, '? and more')),
-            ([tp_get('test')], False, '? and more', (True, None, '? and more')),
-        ]
-        for parsers, at_least_one, in_str, expected in expectations:
+        for parsers, at_least_one, in_str, expected in _ANY_OF_CASES:
             with self.subTest(any_of.__name__,
                               parsers=parsers, at_least_one=at_least_one, in_str=in_str, expected=expected):
                 if at_least_one is not None:
                     self.assertEqual(any_of(*parsers, at_least_one=at_least_one)(in_str), expected)
                 else:
                     self.assertEqual(any_of(*parsers)(in_str), expected)
+        with self.subTest('when called with many parsers, gives the same results'):
+            self.assertEqual(any_of(*[tp_get(str(i)) for i in range(20)])('19'), (True, '1', 1))
+            self.assertEqual(any_of(*[tp_get(str(i)) for i in range(20)])('x'), (False, None, 0))
+            self.assertEqual(any_of(*[tp_get(str(i)) for i in range(20)], at_least_one=False)('x'), (True, None, 0))
+        with self.subTest('when given predictions, gives the same results'):
+            for parsers, at_least_one, in_str, expected in _ANY_OF_CASES:
+                predict = [None] * len(parsers)
+                self.assertEqual(any_of(*parsers, at_least_one=at_least_one, predict=predict)(in_str), expected)
+        with self.subTest('when given predictions, only tries the parsers that can start with the next character'):
+            calls = []
+
+            def tp_counted(parser: ParserAny) -> ParserAny:
+                def tp_counted_parser(in_str: str, pos: int = 0) -> ParseResultAny:
+                    calls.append(parser)
+                    return parser(in_str, pos)
+
+                return tp_counted_parser
+
+            a, b, take = tp_get('a'), tp_get('b'), tp_take
+            parser = any_of(tp_counted(a), tp_counted(b), tp_counted(take), predict=('a', 'bc', None))
+            self.assertEqual(parser('b', 0), (True, 'b', 1))
+            self.assertEqual(calls, [b])
+            calls.clear()
+            self.assertEqual(parser('xa', 1), (True, 'a', 2))
+            self.assertEqual(calls, [a])
+            calls.clear()
+            self.assertEqual(parser('c'), (True, 'c', 1))
+            self.assertEqual(calls, [b, take])
+            calls.clear()
+            self.assertEqual(parser('x'), (True, 'x', 1))
+            self.assertEqual(calls, [take])
+            calls.clear()
+            self.assertEqual(parser(''), (False, None, 0))
+            self.assertEqual(calls, [take])
+            self.assertEqual(any_of(tp_get('a'), predict=('a',), at_least_one=False)('b'), (True, None, 0))
+        with self.subTest('when given the wrong number of predictions, ValueError is raised'):
+            self.assertRaises(ValueError, any_of, tp_get('a'), tp_get('b'), predict=('a',))
         with self.subTest('when called with no args, ValueError is raised'):
             self.assertRaises(ValueError, any_of)
         for at_least_one in (True, False):
@@ -208,14 +350,151 @@ class TestCombinators(TestCase):
                 self.assertRaises(ValueError, any_of, at_least_one=at_least_one)
 
     def test_fails(self):
-        expectations: list[tuple[ParserAny, str, bool]] = [
-            (tp_take, '', True),
-            (tp_take, 'g', False),
-            (tp_take, 'ggh', False),
-            (tp_int, '5', False),
-            (tp_int, 'guh', True),
-        ]
-        for parser, in_str, expected in expectations:
+        for parser, in_str, expected in _FAILS_CASES:
             with self.subTest(fails.__name__,
                               parser=parser, in_str=in_str, expected=expected):
-                self.assertEqual(fails(parser)(in_str), (expected, None, in_str))
+                self.assertEqual(fails(parser)(in_str), (expected, None, 0))
+
+    def test_compile_parser(self):
+        shared = chain(tp_get('a'), optional(tp_get('b')))
+        parsers: list[ParserAny] = [
+            star(tp_take),
+            star_join(any_of(tp_get('a'), tp_get('b'))),
+            chain(tp_get('a'), tp_noop(True), tp_get('b')),
+            chain(tp_get('a'), tp_noop(True), tp_get('b'), skip_none_result=True),
+            chain_join(tp_get('a'), optional(tp_get('b')), tp_get('c')),
+            any_of(tp_get('x'), shared, at_least_one=False),
+            any_of(chain(shared, tp_get('c')), chain(shared, tp_get('d'))),
+            transform(star(tp_int), sum),
+            transform(tp_take, int),
+            transform(tp_int, _twice, safe=True),
+            ignore_whitespace(chain(tp_get('a'), fails(tp_get('a'))), IgnoreWhitespaceType.AROUND),
+            ignore_whitespace(tp_get('a'), IgnoreWhitespaceType.AFTER),
+            ignore_whitespace(eof, IgnoreWhitespaceType.AROUND),
+            star(chain(ignore_whitespace(tp_int), optional(tp_get(',')))),
+            chain(star(get_char_in('ab')), star_join(get_char_in('12'))),
+            star(any_of(tp_get('a'), tp_noop(True))),
+            star_join(optional(tp_get('a'))),
+            any_of(tp_get('ab'), tp_get('a'), chain(shared, tp_get('c')), tp_take, predict=('a', 'a', 'a', None)),
+            any_of(tp_get('x'), tp_get('a'), predict=('x', 'a'), at_least_one=False),
+            transform(tp_take, int, validator=str.isalnum),
+            transform(tp_take, int, safe=True, validator=str.isdigit),
+        ]
+        inputs = ['', 'a', 'ab', 'abc', 'abd', 'aab', 'ba', 'x', 'c', '12a', '1, 2,3 ,', '  a  ', 'a  ', '  aa']
+        for parser in parsers:
+            compiled = compile_parser(parser)
+            for in_str in inputs:
+                for pos in range(len(in_str) + 3):
+                    with self.subTest(compile_parser.__name__, parser=parser, in_str=in_str, pos=pos):
+                        self.assertEqual(compiled(in_str, pos), parser(in_str, pos))
+        with self.subTest('when called twice on the same parser, returns the cached result'):
+            self.assertIs(compile_parser(shared), compile_parser(shared))
+        with self.subTest('when called on a terminal parser, returns it unchanged'):
+            self.assertIs(compile_parser(tp_take), tp_take)
+        with self.subTest('when a custom parser fails with a result, gives None like the uncompiled parser'):
+            def tp_junk(in_str: str, pos: int = 0) -> ParseResultString:
+                return False, 'junk', pos
+
+            for parser in (chain(tp_get('a'), tp_junk), any_of(tp_junk), any_of(tp_junk, at_least_one=False),
+                           any_of(tp_junk, predict=(None,)), ignore_whitespace(tp_junk), transform(tp_junk, str),
+                           transform(tp_junk, str, safe=True), transform(tp_junk, str, validator=bool)):
+                for in_str in ('', 'a', ' a'):
+                    self.assertEqual(compile_parser(parser)(in_str), parser(in_str))
+                    self.assertIsNone(parser(in_str)[1])
+        with self.subTest('when the compiled parser is collected, its source leaves the line cache'):
+            compiled = compile_parser(chain(tp_get('a'), tp_get('b')))
+            filename = compiled.__code__.co_filename
+            self.assertIn(filename, linecache.cache)
+            del compiled
+            gc.collect()
+            self.assertNotIn(filename, linecache.cache)
+
+    def test_memoize(self):
+        calls = []
+
+        def tp_counted(in_str: str, pos: int = 0) -> ParseResultString:
+            calls.append(pos)
+            return tp_get('a')(in_str, pos)
+
+        parser = memoize(tp_counted)
+        in_str = 'aab'
+        with self.subTest(memoize.__name__):
+            self.assertEqual(parser(in_str), (True, 'a', 1))
+            self.assertEqual(parser(in_str, 2), (False, None, 2))
+            self.assertEqual(parser(in_str), (True, 'a', 1))
+            self.assertEqual(parser(in_str, 2), (False, None, 2))
+            self.assertEqual(calls, [0, 2])
+        with self.subTest('when called with a different input, parses again'):
+            self.assertEqual(parser('bab'), (False, None, 0))
+            self.assertEqual(calls, [0, 2, 0])
+        with self.subTest('when another thread switches input during a call, each keeps its own results'):
+            started, release = threading.Event(), threading.Event()
+
+            def tp_slow(in_str: str, pos: int = 0) -> ParseResultString:
+                if in_str == 'aaaa':
+                    started.set()
+                    release.wait(timeout=5)
+                return tp_take(in_str, pos)
+
+            parser = memoize(tp_slow)
+            a_str, b_str = 'a' * 4, 'b' * 4
+            results = []
+            thread = threading.Thread(target=lambda: results.append(parser(a_str)), daemon=True)
+            thread.start()
+            try:
+                self.assertTrue(started.wait(timeout=5))
+                self.assertEqual(parser(b_str), (True, 'b', 1))
+            finally:
+                release.set()
+                thread.join(timeout=5)
+            self.assertEqual(results, [(True, 'a', 1)])
+            self.assertEqual(parser(b_str), (True, 'b', 1))
+
+    def test_finalize_memoize(self):
+        calls = []
+
+        def tp_counted(in_str: str, pos: int = 0) -> ParseResultString:
+            calls.append(pos)
+            return tp_take(in_str, pos)
+
+        prefix = star(chain(tp_counted, tp_counted))
+        parser = any_of(chain(prefix, tp_get('!')), chain(prefix, tp_get('?')), chain(prefix, eof))
+        for memoized, expected_calls in ((False, 15), (True, 5)):
+            calls.clear()
+            with self.subTest(finalize.__name__, memoize=memoized):
+                self.assertEqual(finalize(parser, memoize=memoized)('abcd'), [[['a', 'b'], ['c', 'd']], None])
+                self.assertEqual(len(calls), expected_calls)
+        with self.subTest('when the same input is parsed twice, parses it again'):
+            in_str = 'abcd'
+            parser = finalize(parser, memoize=True)
+            calls.clear()
+            parser(in_str)
+            parser(in_str)
+            self.assertEqual(len(calls), 10)
+        with self.subTest('when a transformer parses another string meanwhile, results for it are kept apart'):
+            word = memoize(star_join(get_char_in('abcdef')))
+            parser = any_of(chain(transform(take_n(3), finalize(word)), get('!')), word)
+            self.assertEqual(finalize(parser)('abcdef'), 'abcdef')
+            self.assertEqual(finalize(parser, memoize=True)('abcdef'), 'abcdef')
+
+    def test_finalize_cache_size(self):
+        calls = []
+
+        def tp_counted(in_str: str, pos: int = 0) -> ParseResultList:
+            calls.append(in_str)
+            return star(tp_take)(in_str, pos)
+
+        parser = finalize(tp_counted, cache_size=2)
+        with self.subTest(finalize.__name__, cache_size=2):
+            self.assertEqual(parser('ab'), ['a', 'b'])
+            self.assertEqual(parser('ab'), ['a', 'b'])
+            self.assertEqual(parser('cd'), ['c', 'd'])
+            self.assertEqual(parser('ab'), ['a', 'b'])
+            self.assertEqual(calls, ['ab', 'cd'])
+        with self.subTest('when the result is mutated, later results are unaffected'):
+            parser('ab').append('c')
+            self.assertEqual(parser('ab'), ['a', 'b'])
+        with self.subTest('when the least recently used input is evicted, parses it again'):
+            parser('ef')
+            parser('cd')
+            self.assertEqual(calls, ['ab', 'cd', 'ef', 'cd'])
@@ -1,3 +1,4 @@
+from enum import StrEnum
 from unittest import TestCase
 
 from functionalparser import *
@@ -6,39 +7,69 @@ from functionalparser import *
 class TestGenerators(TestCase):
     def test_take_n(self):
         expectations: list[tuple[int, str, ParseResultString]] = [
-            (5, 'aaaaabbb', (True, 'aaaaa', 'bbb')),
-            (3, 'aaaaabbb', (True, 'aaa', 'aabbb')),
-            (1, 'test', (True, 't', 'est')),
-            (4, 'test', (True, 'test', '')),
-            (1, '', (False, None, '')),
-            (5, 'aaa', (False, None, 'aaa')),
+            (5, 'aaaaabbb', (True, 'aaaaa', 5)),
+            (3, 'aaaaabbb', (True, 'aaa', 3)),
+            (1, 'test', (True, 't', 1)),
+            (4, 'test', (True, 'test', 4)),
+            (1, '', (False, None, 0)),
+            (5, 'aaa', (False, None, 0)),
         ]
         for n, in_str, expected in expectations:
             with self.subTest(take_n.__name__,
                               n=n, in_str=in_str, expected=expected):
                 self.assertEqual(take_n(n)(in_str), expected)
+        with self.subTest('when starting mid-input, takes from pos'):
+            self.assertEqual(take_n(2)('abcd', 1), (True, 'bc', 3))
+            self.assertEqual(take_n(2)('abcd', 3), (False, None, 3))
 
     def test_get_char_in(self):
         expectations: list[tuple[str, str, ParseResultString]] = [
-            ('abc', 'a...', (True, 'a', '...')),
-            ('abc', 'b...', (True, 'b', '...')),
-            ('abc', 'c...', (True, 'c', '...')),
-            ('abc', '?...', (False, None, '?...')),
-            ('abc', 'a', (True, 'a', '')),
+            ('abc', 'a...', (True, 'a', 1)),
+            ('abc', 'b...', (True, 'b', 1)),
+            ('abc', 'c...', (True, 'c', 1)),
+            ('abc', '?...', (False, None, 0)),
+            ('abc', 'a', (True, 'a', 1)),
         ]
         for charset, in_str, expected in expectations:
             with self.subTest(get_char_in.__name__,
                               charset=charset, in_str=in_str, expected=expected):
                 self.assertEqual(get_char_in(charset)(in_str), expected)
+        with self.subTest('when starting mid-input, checks the character at pos'):
+            self.assertEqual(get_char_in('abc')('?b', 1), (True, 'b', 2))
+            self.assertEqual(get_char_in('abc')('a?', 1), (False, None, 1))
+            self.assertEqual(get_char_in('abc')('a', 1), (False, None, 1))
 
     def test_get(self):
         expectations: list[tuple[str, str, ParseResultString]] = [
-            ('abc', 'abc', (True, 'abc', '')),
-            ('abc', 'abc...', (True, 'abc', '...')),
-            ('test', 'test message', (True, 'test', ' message')),
-            ('test', 'bad message', (False, None, 'bad message')),
+            ('abc', 'abc', (True, 'abc', 3)),
+            ('abc', 'abc...', (True, 'abc', 3)),
+            ('test', 'test message', (True, 'test', 4)),
+            ('test', 'bad message', (False, None, 0)),
+            ('-', '-5', (True, '-', 1)),
+            ('-', '+5', (False, None, 0)),
+            ('-', '', (False, None, 0)),
+            ('', 'abc', (True, '', 0)),
+            ('->', '->x', (True, '->', 2)),
+            ('->', '-', (False, None, 0)),
+            ('->', '=>', (False, None, 0)),
         ]
         for prefix, in_str, expected in expectations:
             with self.subTest(get.__name__,
                               prefix=prefix, in_str=in_str, expected=expected):
                 self.assertEqual(get(prefix)(in_str), expected)
+        with self.subTest('when starting mid-input, matches at pos'):
+            self.assertEqual(get('test')('a test', 2), (True, 'test', 6))
+            self.assertEqual(get('test')('test', 1), (False, None, 1))
+            self.assertEqual(get('-')('5-', 1), (True, '-', 2))
+            self.assertEqual(get('-')('-', 1), (False, None, 1))
+            self.assertEqual(get('->')('x->', 1), (True, '->', 3))
+            self.assertEqual(get('->')('x->', 2), (False, None, 2))
+        with self.subTest('when the prefix is a str subclass, returns it as is'):
+            class Op(StrEnum):
+                PLUS = '+'
+                ARROW = '->'
+                ELLIPSIS = '....'
+
+            for op in Op:
+                self.assertEqual(get(op)(f'{op}x'), (True, op, len(op)))
+                self.assertIs(get(op)(f'{op}x')[1], op)
@@ -6,12 +6,12 @@ from functionalparser import *
 class TestParsers(TestCase):
     def test_digit(self):
         expectations: list[tuple[str, ParseResultString]] = []
-        expectations += [(f'{i}a', (True, str(i), 'a')) for i in range(10)]
-        expectations += [(f'{i}other', (True, str(i), 'other')) for i in range(10)]
-        expectations += [(str(i), (True, str(i), '')) for i in range(10)]
+        expectations += [(f'{i}a', (True, str(i), 1)) for i in range(10)]
+        expectations += [(f'{i}other', (True, str(i), 1)) for i in range(10)]
+        expectations += [(str(i), (True, str(i), 1)) for i in range(10)]
         expectations += [
-            ('', (False, None, '')),
-            ('what?', (False, None, 'what?')),
+            ('', (False, None, 0)),
+            ('what?', (False, None, 0)),
         ]
         for in_str, expected in expectations:
             with self.subTest(digit.__name__,
@@ -21,12 +21,12 @@ class TestParsers(TestCase):
     def test_single_whitespace(self):
         whitespace = ' \t\n\r'
         expectations: list[tuple[str, ParseResultString]] = []
-        expectations += [(ws, (True, ws, '')) for ws in whitespace]
-        expectations += [(f'{ws}a', (True, ws, 'a')) for ws in whitespace]
-        expectations += [(f'{ws}other', (True, ws, 'other')) for ws in whitespace]
+        expectations += [(ws, (True, ws, 1)) for ws in whitespace]
+        expectations += [(f'{ws}a', (True, ws, 1)) for ws in whitespace]
+        expectations += [(f'{ws}other', (True, ws, 1)) for ws in whitespace]
         expectations += [
-            ('', (False, None, '')),
-            ('nope', (False, None, 'nope')),
+            ('', (False, None, 0)),
+            ('nope', (False, None, 0)),
         ]
         for in_str, expected in expectations:
             with self.subTest(single_whitespace.__name__,
@@ -35,22 +35,26 @@ class TestParsers(TestCase):
 
     def test_all_whitespace(self):
         expectations: list[tuple[str, ParseResultString]] = [
-            ('   \n\ttest', (True, '   \n\t', 'test')),
-            (' one', (True, ' ', 'one')),
-            ('\t\ttwo', (True, '\t\t', 'two')),
-            ('none', (True, '', 'none')),
-            ('', (True, '', '')),
+            ('   \n\ttest', (True, '   \n\t', 5)),
+            (' one', (True, ' ', 1)),
+            ('\t\ttwo', (True, '\t\t', 2)),
+            ('none', (True, '', 0)),
+            ('', (True, '', 0)),
         ]
         for in_str, expected in expectations:
             with self.subTest(all_whitespace.__name__,
                               in_str=in_str, expected=expected):
                 self.assertEqual(all_whitespace(in_str), expected)
+        with self.subTest('when starting mid-input or past its end, parses from pos'):
+            self.assertEqual(all_whitespace('a  b', 1), (True, '  ', 3))
+            self.assertEqual(all_whitespace('a  b', 3), (True, '', 3))
+            self.assertEqual(all_whitespace(' ', 3), (True, '', 3))
 
     def test_eof(self):
         expectations: list[tuple[str, ParseResultString]] = [
-            ('', (True, None, '')),
-            ('?', (False, None, '?')),
-            ('test', (False, None, 'test')),
+            ('', (True, None, 0)),
+            ('?', (False, None, 0)),
+            ('test', (False, None, 0)),
         ]
         for in_str, expected in expectations:
             with self.subTest(eof.__name__,
@@ -59,24 +63,27 @@ class TestParsers(TestCase):
 
     def test_parse_int(self):
         expectations: list[tuple[str, ParseResultInt]] = [
-            ('0', (True, 0, '')),
-            ('0a', (True, 0, 'a')),
-            ('7', (True, 7, '')),
-            ('12', (True, 12, '')),
-            ('12 things', (True, 12, ' things')),
-            ('-50', (True, -50, '')),
-            ('-50 dollars', (True, -50, ' dollars')),
-            ('0005', (True, 5, '')),
-            ('0001505', (True, 1505, '')),
-            ('-00978', (True, -978, '')),
-            ('eight', (False, None, 'eight')),
-            ('+5', (True, 5, '')),
-            ('+05', (True, 5, '')),
-            ('huh?', (False, None, 'huh?')),
-            ('', (False, None, '')),
-            (' 10', (False, None, ' 10')),
+            ('0', (True, 0, 1)),
+            ('0a', (True, 0, 1)),
+            ('7', (True, 7, 1)),
+            ('12', (True, 12, 2)),
+            ('12 things', (True, 12, 2)),
+            ('-50', (True, -50, 3)),
+            ('-50 dollars', (True, -50, 3)),
+            ('0005', (True, 5, 4)),
+            ('0001505', (True, 1505, 7)),
+            ('-00978', (True, -978, 6)),
+            ('eight', (False, None, 0)),
+            ('+5', (True, 5, 2)),
+            ('+05', (True, 5, 3)),
+            ('huh?', (False, None, 0)),
+            ('', (False, None, 0)),
+            (' 10', (False, None, 0)),
         ]
         for in_str, expected in expectations:
             with self.subTest(parse_int.__name__,
                               in_str=in_str, expected=expected):
                 self.assertEqual(parse_int(in_str), expected)
+        with self.subTest('when starting mid-input, parses from pos'):
+            self.assertEqual(parse_int('x = -12;', 4), (True, -12, 7))
+            self.assertEqual(parse_int('x = y;', 4), (False, None, 4))